@@ -1,100 +1,199 @@
 import sys
+import time
 import csv
+import functools
 from PyQt5.QtWidgets import (
-    QApplication, QMainWindow, QWidget, QVBoxLayout, QPushButton, QLineEdit, QLabel, QStackedWidget, QFileDialog, QListWidget, QGridLayout, QFrame, QHBoxLayout, QMenuBar, QMenu, QAction, QTextEdit, QProgressBar, QMessageBox
+    QApplication, QMainWindow, QWidget, QVBoxLayout, QPushButton, QLineEdit, QLabel, QStackedWidget, QFileDialog, QListWidget, QListView, QGridLayout, QFrame, QHBoxLayout, QMenuBar, QMenu, QAction, QTextEdit, QProgressBar, QMessageBox
 )
-from PyQt5.QtCore import QTimer, Qt, QCoreApplication, QThread, pyqtSignal, QObject
+from PyQt5.QtCore import Qt, QCoreApplication, QStringListModel, QThread, pyqtSignal, pyqtSlot, QObject
 import qasync
 import asyncio
-import xml.etree.ElementTree as ET
 import socket
+try:
+    from lxml import etree as ET
+    XMLParseError = ET.XMLSyntaxError
+except ImportError:
+    import xml.etree.ElementTree as ET
+    XMLParseError = ET.ParseError
+
+CSV_BUFFER_SIZE = 1 << 16
+CSV_FLUSH_ROWS = 64
+
+# Log ekranındaki bölümler: (cihaz anahtarı, hücre başlığı, değer etiketi anahtarı)
+LOGGING_SECTIONS = (
+    ('channels', lambda channel: f"{channel['name']}", lambda channel: channel['number']),
+    ('voltage_channels', lambda channel: f"Voltage Channel {channel['number']}", lambda channel: f"VOLT{channel['number']}"),
+    ('current_channels', lambda channel: f"Current Channel {channel['number']}", lambda channel: f"CURR{channel['number']}"),
+)
+
+@functools.lru_cache(maxsize=256)
+def encode_command(command):
+    # Sık tekrarlanan SCPI komutları her gönderimde yeniden kodlanmaz; parametreli
+    # tek seferlik pipeline mesajları önbelleği doldurmasın diye burada kullanılmaz
+    return f"{command}\n".encode('ascii')
 
 class SCPIClient:
-    def __init__(self, ip, port=5025):
+    def __init__(self, ip, port=5025, timeout=5):
         self.ip = ip
         self.port = port
-        self.sock = None
+        self.timeout = timeout
+        self.reader = None
+        self.writer = None
         self.channels = []
 
     async def connect(self):
-        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.sock.settimeout(5)
         try:
-            self.sock.connect((self.ip, self.port))
-        except socket.error as e:
+            self.reader, self.writer = await asyncio.wait_for(
+                asyncio.open_connection(self.ip, self.port), self.timeout
+            )
+            # Küçük SCPI mesajlarının Nagle algoritması yüzünden bekletilmemesi için
+            sock = self.writer.get_extra_info('socket')
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        except asyncio.TimeoutError:
+            raise ConnectionError(f"Connection error to {self.ip}: no connection within {self.timeout} s")
+        except OSError as e:
+            # setsockopt hatasında açılmış bağlantı da kapatılır
+            self.close()
             raise ConnectionError(f"Connection error to {self.ip}: {e}")
 
     async def send_command(self, command):
-        if not self.sock:
+        if not self.writer:
+            await self.connect()
+        try:
+            self.writer.write(encode_command(command))
+            await self.writer.drain()
+        except OSError as e:
+            self.close()
+            raise ConnectionError(f"Error sending command to {self.ip}: {e}")
+        # Sorgu olmayan komutlar (ör. *RST) yanıt döndürmez
+        if not command.endswith('?'):
+            return ''
+        return await self.read_response()
+
+    async def send_pipeline(self, commands):
+        # Komutlar tek mesajda gönderilir; sorgu yanıtları ';' ile ayrılmış tek satır döner
+        if not self.writer:
+            await self.connect()
+        message = ';'.join(
+            command if command.startswith(('*', ':')) else f':{command}'
+            for command in commands
+        )
+        try:
+            self.writer.write(f"{message}\n".encode('ascii'))
+            await self.writer.drain()
+        except OSError as e:
+            self.close()
+            raise ConnectionError(f"Error sending command to {self.ip}: {e}")
+        if not any(command.endswith('?') for command in commands):
+            return []
+        response = await self.read_response()
+        return response.split(';')
+
+    async def send_raw(self, payload):
+        # Önceden kodlanmış (ve '\n' ile biten) sorgu mesajını gönderir
+        if not self.writer:
             await self.connect()
         try:
-            self.sock.sendall(f"{command}\n".encode('ascii'))
-            return await self.read_response()
-        except socket.error as e:
+            self.writer.write(payload)
+            await self.writer.drain()
+        except OSError as e:
+            self.close()
             raise ConnectionError(f"Error sending command to {self.ip}: {e}")
+        return await self.read_response()
 
     async def read_response(self):
+        # Hata sonrası geç gelen yanıt sonraki sorguya karışmasın diye bağlantı kapatılır;
+        # sonraki gönderim temiz bir akışla yeniden bağlanır
         try:
-            response = self.sock.recv(4096).decode('ascii').strip()
-            return response
-        except socket.error as e:
+            line = await asyncio.wait_for(self.reader.readline(), self.timeout)
+        except asyncio.TimeoutError:
+            self.close()
+            raise ConnectionError(f"Error reading response from {self.ip}: no response within {self.timeout} s")
+        except OSError as e:
+            self.close()
             raise ConnectionError(f"Error reading response from {self.ip}: {e}")
+        return line.decode('ascii').rstrip()
 
     def close(self):
-        if self.sock:
-            self.sock.close()
-            self.sock = None
+        if self.writer:
+            self.writer.close()
+            self.reader = None
+            self.writer = None
+
+def iter_device_elements(file_path):
+    # Dosya akış halinde okunur; işlenen cihaz elemanları bellekten atılır
+    for _, element in ET.iterparse(file_path, events=('end',)):
+        if element.tag not in ('ElectronicLoad', 'PowerSupply'):
+            continue
+        yield element
+        element.clear()
+        if hasattr(element, 'getprevious'):
+            while element.getprevious() is not None:
+                del element.getparent()[0]
 
 def read_devices_from_xml(file_path):
-    tree = ET.parse(file_path)
-    root = tree.getroot()
-    devices = []
-
-    for device in root.findall('ElectronicLoads/ElectronicLoad'):
-        device_info = {
-            'id': device.find('ID').text,
-            'ip': device.find('IP').text,
-            'port': int(device.find('Port').text),
-            'channels': []
+    loads = []
+    power_supplies = []
+
+    for device in iter_device_elements(file_path):
+        if device.tag == 'PowerSupply':
+            power_supplies.append(read_power_supply(device))
+        else:
+            loads.append(read_electronic_load(device))
+
+    return loads + power_supplies
+
+def read_electronic_load(device):
+    device_info = {
+        'id': device.find('ID').text,
+        'ip': device.find('IP').text,
+        'port': int(device.find('Port').text),
+        'channels': []
+    }
+    for channel in device.find('Channels').findall('Channel'):
+        channel_info = {
+            'number': int(channel.find('Number').text),
+            'name': channel.find('Name').text,
+            'type': channel.find('Type').text,
+            'value': float(channel.find('Value').text)
         }
-        for channel in device.find('Channels').findall('Channel'):
-            channel_info = {
-                'number': int(channel.find('Number').text),
-                'name': channel.find('Name').text,
-                'type': channel.find('Type').text,
-                'value': float(channel.find('Value').text)
-            }
-            device_info['channels'].append(channel_info)
-        devices.append(device_info)
-
-    for device in root.findall('PowerSupplys/PowerSupply'):
-        device_info = {
-            'id': device.find('ID').text,
-            'ip': device.find('IP').text,
-            'port': int(device.find('Port').text),
-            'voltage_channels': [],
-            'current_channels': []
+        # Loglama sırasında her tick'te yeniden formatlanmaması için önceden kodlanır
+        channel_info['measure_command'] = (
+            f"CHAN {channel_info['number']};"
+            ":MEASure:CURRent?;:MEASure:VOLTage?;:MEASure:RESistance?\n"
+        ).encode('ascii')
+        device_info['channels'].append(channel_info)
+    return device_info
+
+def read_power_supply(device):
+    device_info = {
+        'id': device.find('ID').text,
+        'ip': device.find('IP').text,
+        'port': int(device.find('Port').text),
+        'voltage_channels': [],
+        'current_channels': []
+    }
+    for channel in device.find('VoltageValues').findall('Channel'):
+        channel_info = {
+            'number': int(channel.find('Number').text),
+            'value': float(channel.find('Value').text)
         }
-        for channel in device.find('VoltageValues').findall('Channel'):
-            channel_info = {
-                'number': int(channel.find('Number').text),
-                'value': float(channel.find('Value').text)
-            }
-            device_info['voltage_channels'].append(channel_info)
-        for channel in device.find('CurrentValues').findall('Channel'):
-            channel_info = {
-                'number': int(channel.find('Number').text),
-                'value': float(channel.find('Value').text)
-            }
-            device_info['current_channels'].append(channel_info)
-        devices.append(device_info)
-
-    return devices
+        device_info['voltage_channels'].append(channel_info)
+    for channel in device.find('CurrentValues').findall('Channel'):
+        channel_info = {
+            'number': int(channel.find('Number').text),
+            'value': float(channel.find('Value').text)
+        }
+        device_info['current_channels'].append(channel_info)
+    return device_info
 
+@functools.lru_cache(maxsize=4)
 def read_commands_from_document(file_path):
+    # Sonuç önbellekte paylaşıldığı için değiştirilemez tuple döndürülür
     tree = ET.parse(file_path)
     root = tree.getroot()
-    commands = [command.text for command in root.findall('command')]
+    commands = tuple(command.text for command in root.findall('command'))
     return commands
 
 class AsyncWorker(QObject):
@@ -109,57 +208,201 @@ class AsyncWorker(QObject):
         self.scpi_clients = []
 
     async def run(self):
-        total_devices = len(self.devices)
-        for idx, device in enumerate(self.devices):
-            client = SCPIClient(device['ip'], device['port'])
-            client.channels = device.get('channels', [])
+        # Cihazlar paralel olarak başlatılır; ilerleme her cihaz bittiğinde güncellenir
+        tasks = [asyncio.ensure_future(self.initialize_device(device)) for device in self.devices]
+        completed = 0
+        for future in asyncio.as_completed(tasks):
             try:
-                await client.connect()
-                response = await client.send_command('*IDN?')
-                if response:
-                    self.result.emit(f"Cihaz {device['id']} bağlı: {response}")
-                    if 'channels' in device:
-                        for channel in client.channels:
-                            await self.initialize_channel(client, channel)
-                    else:
-                        for channel in device['voltage_channels']:
-                            await self.initialize_voltage_channel(client, channel)
-                        for channel in device['current_channels']:
-                            await self.initialize_current_channel(client, channel)
-                    self.scpi_clients.append(client)
-                else:
-                    self.result.emit(f"Cihaz {device['id']} bağlanamadı.")
-            except ConnectionError as e:
+                await future
+            except Exception as e:
                 self.error.emit(str(e))
-            
-            self.progress.emit((idx + 1) * 100 // total_devices)
+            completed += 1
+            self.progress.emit(completed * 100 // len(tasks))
+        # İstemci listesi XML'deki cihaz sırasını korur
+        self.scpi_clients = [
+            task.result() for task in tasks
+            if not task.exception() and task.result() is not None
+        ]
         self.done.emit()
 
+    async def initialize_device(self, device):
+        client = SCPIClient(device['ip'], device['port'])
+        client.channels = device.get('channels', [])
+        initialized = False
+        try:
+            await client.connect()
+            response = await client.send_command('*IDN?')
+            if response:
+                self.result.emit(f"Cihaz {device['id']} bağlı: {response}")
+                if 'channels' in device:
+                    for channel in client.channels:
+                        await self.initialize_channel(client, channel)
+                else:
+                    for channel in device['voltage_channels']:
+                        await self.initialize_voltage_channel(client, channel)
+                    for channel in device['current_channels']:
+                        await self.initialize_current_channel(client, channel)
+                initialized = True
+                return client
+            self.result.emit(f"Cihaz {device['id']} bağlanamadı.")
+        except ConnectionError as e:
+            self.error.emit(str(e))
+        finally:
+            # Beklenmeyen istisnalarda da (ör. ASCII olmayan yanıt) bağlantı açık kalmaz
+            if not initialized:
+                client.close()
+        return None
+
     async def initialize_channel(self, client, channel):
         number = channel['number']
         type_ = channel['type']
         value = channel['value']
         
-        await client.send_command(f'CHAN {number}')
-        await client.send_command(f'FUNC {type_}')
-        if type_ == 'RES':
-            await client.send_command(f'RES {value}')
-        elif type_ == 'CURR':
-            await client.send_command(f'CURR {value}')
-        elif type_ == 'VOLT':
-            await client.send_command(f'VOLT {value}')
+        commands = [f'CHAN {number}', f'FUNC {type_}']
+        if type_ in ('RES', 'CURR', 'VOLT'):
+            commands.append(f'{type_} {value}')
+        await client.send_pipeline(commands)
 
     async def initialize_voltage_channel(self, client, channel):
         number = channel['number']
         value = channel['value']
         
-        await client.send_command(f'VOLT {number},{value}')
+        await client.send_pipeline([f'VOLT {number},{value}'])
 
     async def initialize_current_channel(self, client, channel):
         number = channel['number']
         value = channel['value']
         
-        await client.send_command(f'CURR {number},{value}')
+        await client.send_pipeline([f'CURR {number},{value}'])
+
+class CsvWriter(QObject):
+    closed = pyqtSignal()
+    error = pyqtSignal(str)
+
+    def __init__(self):
+        super().__init__()
+        self.csv_fp = None
+        self.csv_writer = None
+        self.rows_since_flush = 0
+
+    # Slot içinde yakalanmayan istisna PyQt'de uygulamayı sonlandırır; hatalar sinyalle bildirilir
+    @pyqtSlot(str)
+    def open_file(self, file_path):
+        # Dosya loglama boyunca açık kalır, her tick'te yeniden açılmaz
+        try:
+            self.csv_fp = open(file_path, 'w', newline='', buffering=CSV_BUFFER_SIZE)
+            self.csv_writer = csv.writer(self.csv_fp, quoting=csv.QUOTE_MINIMAL)
+            self.csv_writer.writerow(['Time', 'IP', 'Channel', 'Current', 'Voltage', 'Resistance'])
+        except OSError as e:
+            self.error.emit(f"Log dosyası açılamadı: {e}")
+
+    @pyqtSlot(list)
+    def write_rows(self, rows):
+        if not self.csv_writer:
+            return
+        try:
+            self.csv_writer.writerows(rows)
+            self.rows_since_flush += len(rows)
+            if self.rows_since_flush >= CSV_FLUSH_ROWS:
+                self.csv_fp.flush()
+                self.rows_since_flush = 0
+        except OSError as e:
+            self.error.emit(f"Log dosyasına yazılamadı: {e}")
+
+    @pyqtSlot()
+    def close_file(self):
+        if self.csv_fp:
+            try:
+                self.csv_fp.close()
+            except OSError as e:
+                self.error.emit(f"Log dosyası kapatılamadı: {e}")
+            self.csv_fp = None
+            self.csv_writer = None
+            self.rows_since_flush = 0
+        self.closed.emit()
+
+class LoggingWorker(QObject):
+    measured = pyqtSignal(list)  # tick başına [(ip, kanal, akım, gerilim, direnç), ...]
+    error = pyqtSignal(str)
+    rows_ready = pyqtSignal(list)
+    open_requested = pyqtSignal(str)
+    close_requested = pyqtSignal()
+
+    def __init__(self, scpi_clients, csv_file):
+        super().__init__()
+        self.scpi_clients = scpi_clients
+        self.csv_file = csv_file
+        self.log_task = None
+        self.stop_event = asyncio.Event()
+        self.stopped = None
+
+        # Dosya yazma işlemleri GUI thread'ini bloklamaması için ayrı thread'de yapılır
+        self.csv_thread = QThread()
+        self.csv_writer = CsvWriter()
+        self.csv_writer.moveToThread(self.csv_thread)
+        self.open_requested.connect(self.csv_writer.open_file)
+        self.rows_ready.connect(self.csv_writer.write_rows)
+        self.close_requested.connect(self.csv_writer.close_file)
+        self.csv_writer.error.connect(self.error)
+        # quit() thread-safe'tir; dosya kapanır kapanmaz yazıcı thread'inden doğrudan çağrılır
+        self.csv_writer.closed.connect(self.csv_thread.quit, Qt.DirectConnection)
+        self.csv_thread.finished.connect(self.on_csv_thread_finished)
+
+    def start(self, interval):
+        self.stopped = asyncio.get_event_loop().create_future()
+        self.csv_thread.start()
+        self.open_requested.emit(self.csv_file)
+        self.log_task = asyncio.ensure_future(self.log_loop(interval))
+
+    async def stop(self):
+        # Devam eden ölçüm iptal edilmez; yarım kalan yanıt soketi bozmasın diye tick bitince döngü sonlanır
+        self.stop_event.set()
+        # Eski döngü aynı SCPI akışlarını kullandığı için yeni loglama ancak o bittikten sonra başlar
+        if self.log_task:
+            await self.log_task
+        if self.stopped:
+            await self.stopped
+
+    @pyqtSlot()
+    def on_csv_thread_finished(self):
+        if self.stopped and not self.stopped.done():
+            self.stopped.set_result(None)
+
+    async def log_loop(self, interval):
+        # Bir tick aralıktan uzun sürerse sonraki tick üst üste binmez, hemen başlar
+        loop = asyncio.get_event_loop()
+        try:
+            while not self.stop_event.is_set():
+                started = loop.time()
+                await self.log_data()
+                remaining = max(0, interval - (loop.time() - started))
+                try:
+                    await asyncio.wait_for(self.stop_event.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            # Son tick'in satırları yazıldıktan sonra dosya kapatılır
+            self.close_requested.emit()
+
+    async def log_data(self):
+        timestamp = time.time()  # Tick'teki tüm satırlar aynı zaman damgasını taşır
+        rows = []
+        measurements = []
+        for client in self.scpi_clients:
+            try:
+                for channel in client.channels:
+                    response = await client.send_raw(channel['measure_command'])
+                    current, voltage, resistance = response.split(';')
+                    print(f"{client.ip} - Channel {channel['number']} - Current: {current}, Voltage: {voltage}, Resistance: {resistance}")
+                    rows.append([timestamp, client.ip, channel['number'], current, voltage, resistance])
+                    measurements.append((client.ip, channel['number'], current, voltage, resistance))
+            except Exception as e:
+                print(f"Error during logging from {client.ip}: {e}")
+        if rows:
+            self.rows_ready.emit(rows)
+        # Verileri ekranda tek seferde güncelle
+        if measurements:
+            self.measured.emit(measurements)
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -170,8 +413,10 @@ class MainWindow(QMainWindow):
         self.setCentralWidget(self.central_widget)
         self.init_ui()
         self.scpi_clients = []  # SCPIClient örnekleri listesi
-        self.logging_timer = None
+        self.logging_worker = None
+        self.logging_lock = asyncio.Lock()
         self.csv_file = 'log_data.csv'
+        self.value_labels = {}  # (ip, kanal) -> değer etiketi
         self.devices = None
 
     def init_ui(self):
@@ -356,12 +601,14 @@ class MainWindow(QMainWindow):
         layout.addWidget(self.command_input)
         layout.setAlignment(self.command_input, Qt.AlignCenter)
 
-        self.command_list = QListWidget()
+        self.command_list = QListView()
+        self.command_model = QStringListModel()
+        self.command_list.setModel(self.command_model)
         self.load_commands()
         layout.addWidget(self.command_list)
         layout.setAlignment(self.command_list, Qt.AlignCenter)
 
-        self.command_list.itemClicked.connect(self.on_command_selected)
+        self.command_list.clicked.connect(self.on_command_selected)
 
         btn_connect_manual = QPushButton("Bağlan ve Komut Gönder")
         btn_connect_manual.clicked.connect(lambda: self.connect_and_send_manual_command())
@@ -407,11 +654,10 @@ class MainWindow(QMainWindow):
 
     def load_commands(self):
         commands = read_commands_from_document('commands.xml')  # Komutları dokümandan okuma
-        for command in commands:
-            self.command_list.addItem(command)
+        self.command_model.setStringList(list(commands))
 
-    def on_command_selected(self, item):
-        self.command_input.setText(item.text())
+    def on_command_selected(self, index):
+        self.command_input.setText(index.data())
 
     def browse_file(self):
         options = QFileDialog.Options()
@@ -431,8 +677,11 @@ class MainWindow(QMainWindow):
             QMessageBox.information(self, "Başarılı", "XML dosyası başarıyla yüklendi.")
         except FileNotFoundError:
             QMessageBox.critical(self, "Hata", f"XML dosyası bulunamadı: {file_path}")
-        except ET.ParseError:
+        except XMLParseError:
             QMessageBox.critical(self, "Hata", f"XML dosyası okunamadı: {file_path}")
+        except OSError:
+            # lxml eksik dosyada FileNotFoundError yerine düz OSError fırlatır
+            QMessageBox.critical(self, "Hata", f"XML dosyası açılamadı: {file_path}")
 
     def start_initialize(self):
         if not self.devices:
@@ -464,62 +713,36 @@ class MainWindow(QMainWindow):
         QMessageBox.information(self, "Başarılı", "Initialize işlemi tamamlandı.")
         self.scpi_clients = self.worker.scpi_clients
 
+    def make_cell(self, title):
+        # Her kanal için iki düz QLabel; ara QFrame/QVBoxLayout oluşturulmaz
+        label = QLabel(title)
+        label.setFixedWidth(200)
+        value_label = QLabel("N/A")
+        value_label.setFixedWidth(200)
+        value_label.setFrameShape(QFrame.Box)
+        return label, value_label
+
+    def add_cell(self, title, key, row, col):
+        label, value_label = self.make_cell(title)
+        self.value_labels[key] = value_label
+        self.grid_layout.addWidget(label, row * 2, col)
+        self.grid_layout.addWidget(value_label, row * 2 + 1, col)
+        col += 1
+        if col == 8:
+            col = 0
+            row += 1
+        return row, col
+
     def setup_logging_display(self, devices):
         self.grid_layout = QGridLayout()
+        self.value_labels = {}
         row = 0
         col = 0
 
         for device in devices:
-            if 'channels' in device:
-                for channel in device.get('channels', []):
-                    frame = QFrame()
-                    frame.setFrameShape(QFrame.Box)
-                    frame.setFixedSize(200, 50)
-                    layout = QVBoxLayout()
-                    label = QLabel(f"{channel['name']}")
-                    value_label = QLabel("N/A")
-                    layout.addWidget(label)
-                    layout.addWidget(value_label)
-                    frame.setLayout(layout)
-                    self.grid_layout.addWidget(frame, row, col)
-                    col += 1
-                    if col == 8:
-                        col = 0
-                        row += 1
-
-            if 'voltage_channels' in device:
-                for channel in device.get('voltage_channels', []):
-                    frame = QFrame()
-                    frame.setFrameShape(QFrame.Box)
-                    frame.setFixedSize(200, 50)
-                    layout = QVBoxLayout()
-                    label = QLabel(f"Voltage Channel {channel['number']}")
-                    value_label = QLabel("N/A")
-                    layout.addWidget(label)
-                    layout.addWidget(value_label)
-                    frame.setLayout(layout)
-                    self.grid_layout.addWidget(frame, row, col)
-                    col += 1
-                    if col == 8:
-                        col = 0
-                        row += 1
-
-            if 'current_channels' in device:
-                for channel in device.get('current_channels', []):
-                    frame = QFrame()
-                    frame.setFrameShape(QFrame.Box)
-                    frame.setFixedSize(200, 50)
-                    layout = QVBoxLayout()
-                    label = QLabel(f"Current Channel {channel['number']}")
-                    value_label = QLabel("N/A")
-                    layout.addWidget(label)
-                    layout.addWidget(value_label)
-                    frame.setLayout(layout)
-                    self.grid_layout.addWidget(frame, row, col)
-                    col += 1
-                    if col == 8:
-                        col = 0
-                        row += 1
+            for section, title, key in LOGGING_SECTIONS:
+                for channel in device.get(section, ()):
+                    row, col = self.add_cell(title(channel), (device['ip'], key(channel)), row, col)
 
         # Log ekranındaki layout'u temizle ve yeni layout'u ekle
         self.central_widget.widget(2).layout().addLayout(self.grid_layout)
@@ -530,45 +753,42 @@ class MainWindow(QMainWindow):
     async def async_start_logging(self):
         interval = int(self.logging_interval_input.text())
         print(f"Start logging every {interval} seconds")
-        self.logging_timer = QTimer(self)
-        self.logging_timer.timeout.connect(lambda: asyncio.ensure_future(self.log_data()))
-        self.logging_timer.start(interval * 1000)
-
-        with open(self.csv_file, 'w', newline='') as csvfile:
-            fieldnames = ['Time', 'IP', 'Channel', 'Current', 'Voltage', 'Resistance']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
+        # Başlat/durdur çağrıları sıraya alınır; aynı anda yalnızca bir LoggingWorker çalışır
+        async with self.logging_lock:
+            if self.logging_worker:
+                await self.logging_worker.stop()
+            self.logging_worker = LoggingWorker(self.scpi_clients, self.csv_file)
+            self.logging_worker.measured.connect(self.update_logging_batch)
+            self.logging_worker.error.connect(self.show_logging_error)
+            self.logging_worker.start(interval)
 
     def stop_logging(self):
-        if self.logging_timer:
-            self.logging_timer.stop()
+        asyncio.ensure_future(self.async_stop_logging())
+
+    async def async_stop_logging(self):
+        async with self.logging_lock:
+            if self.logging_worker:
+                await self.logging_worker.stop()
+                self.logging_worker = None
         print("Stop logging")
 
-    async def log_data(self):
-        with open(self.csv_file, 'a', newline='') as csvfile:
-            writer = csv.writer(csvfile)
-            for client in self.scpi_clients:
-                try:
-                    for channel in client.channels:
-                        await client.send_command(f'CHAN {channel["number"]}')
-                        current = await client.send_command('MEASure:CURRent?')
-                        voltage = await client.send_command('MEASure:VOLTage?')
-                        resistance = await client.send_command('MEASure:RESistance?')
-                        print(f"{client.ip} - Channel {channel['number']} - Current: {current}, Voltage: {voltage}, Resistance: {resistance}")
-                        writer.writerow([client.ip, channel['number'], current, voltage, resistance])
-                        # Verileri ekranda güncelle
-                        self.update_logging_display(client.ip, channel['number'], current, voltage, resistance)
-                except Exception as e:
-                    print(f"Error during logging from {client.ip}: {e}")
+    def show_logging_error(self, message):
+        QMessageBox.critical(self, "Hata", message)
+        self.stop_logging()
+
+    def update_logging_batch(self, measurements):
+        # Tüm etiketler güncellendikten sonra tek bir boyama döngüsü yapılır
+        self.logging_settings_screen.setUpdatesEnabled(False)
+        try:
+            for measurement in measurements:
+                self.update_logging_display(*measurement)
+        finally:
+            self.logging_settings_screen.setUpdatesEnabled(True)
 
     def update_logging_display(self, ip, channel, current, voltage, resistance):
-        for i in range(self.grid_layout.count()):
-            frame = self.grid_layout.itemAt(i).widget()
-            label = frame.findChild(QLabel, "")
-            if label and label.text() == f"Channel {channel}":
-                value_label = frame.findChild(QLabel, "", 1)
-                if value_label:
-                    value_label.setText(f"Current: {current}, Voltage: {voltage}, Resistance: {resistance}")
+        value_label = self.value_labels.get((ip, channel))
+        if value_label:
+            value_label.setText(f"Current: {current}, Voltage: {voltage}, Resistance: {resistance}")
 
     def connect_and_send_manual_command(self):
         asyncio.ensure_future(self.async_connect_and_send_manual_command())
@@ -588,16 +808,28 @@ class MainWindow(QMainWindow):
         if response:
             self.response_output.append(f"Komut: {command}\nYanıt: {response}\n")
             self.manual_command_status.setText(f"Komut gönderildi: {response}")
+        elif not command.endswith('?'):
+            self.response_output.append(f"Komut: {command}\nYanıt: (Sorgu değil)\n")
+            self.manual_command_status.setText("Komut gönderildi.")
         else:
             self.response_output.append(f"Komut: {command}\nYanıt: (Yok)\n")
             self.manual_command_status.setText("Komut gönderilemedi.")
         client.close()
 
     def closeEvent(self, event):
+        # Loglama sürüyorsa dosya kapanana kadar pencere kapatılmaz
+        if self.logging_worker:
+            event.ignore()
+            asyncio.ensure_future(self.close_after_logging_stopped())
+            return
         for client in self.scpi_clients:
             client.close()
         event.accept()
 
+    async def close_after_logging_stopped(self):
+        await self.async_stop_logging()
+        self.close()
+
 if __name__ == '__main__':
     app = QApplication(sys.argv)
     loop = qasync.QEventLoop(app)